@@ -0,0 +1,98 @@
+"""
+On-disk JSON cache for upstream API responses.
+
+Entries live under .cache/<namespace>/ as one JSON file per key, and are
+considered fresh while the file's modification time is within the caller's
+TTL. Cache failures never break the pipeline: unreadable entries count as
+misses and failed writes are logged and skipped.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(".cache")
+
+
+def cache_path(namespace: str, *key_parts: Any) -> Path:
+    """
+    Build the cache file path for a namespace and key.
+
+    Parameters:
+        namespace: Cache sub-directory (e.g. "fmp").
+        key_parts: Values identifying the entry; hashed into the file name.
+
+    Returns:
+        Path: Location of the cache file (may not exist yet).
+    """
+    raw_key = "|".join(str(part) for part in key_parts)
+    digest = hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+    return CACHE_DIR / namespace / f"{digest}.json"
+
+
+def load_cached(path: Path, max_age_s: float) -> Optional[Any]:
+    """
+    Load a cached value if it exists and is younger than max_age_s.
+
+    Parameters:
+        path: Cache file path from cache_path().
+        max_age_s: Maximum entry age in seconds.
+
+    Returns:
+        Any | None: Decoded value, or None on miss, expiry or read error.
+    """
+    try:
+        if time.time() - path.stat().st_mtime >= max_age_s:
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable cache entry %s: %s", path, e)
+        return None
+
+
+def store_cached(path: Path, value: Any) -> None:
+    """
+    Atomically write a value to the cache.
+
+    Writes to a temporary file in the same directory and renames it into
+    place, so concurrent readers never observe a partially written entry.
+
+    Parameters:
+        path: Cache file path from cache_path().
+        value: JSON-serializable value to store.
+    """
+    try:
+        atomic_write_text(path, json.dumps(value))
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning("Failed to write cache entry %s: %s", path, e)
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """
+    Write text to path atomically via a temporary file and os.replace.
+
+    Parameters:
+        path: Destination file path; parent directories are created.
+        text: Content to write.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+            tmp_file.write(text)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
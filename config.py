@@ -5,21 +5,35 @@ Loads API keys and credentials from environment variables.
 """
 
 import os
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Union
+
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 
-def get_config() -> dict:
+@lru_cache(maxsize=1)
+def get_config() -> Mapping[str, Union[str, int]]:
     """
     Retrieve all required configuration from environment variables.
     
+    The environment is read once per process and the result is memoized;
+    call get_config.cache_clear() after changing the environment (e.g. in
+    tests) to reload it.
+    
+    Telegram chat and topic IDs are parsed to integers here, once, so the
+    senders can use them directly.
+    
     Returns:
-        dict: Configuration dictionary with API keys and credentials.
+        Mapping[str, Union[str, int]]: Read-only mapping with API keys and
+            credentials.
         
     Raises:
-        ValueError: If required environment variables are missing.
+        ValueError: If required environment variables are missing or a
+            Telegram ID is not an integer.
     """
     required_vars = [
         "FMP_API_KEY",
@@ -44,9 +58,38 @@ def get_config() -> dict:
             "Please set them in your .env file or export them as environment variables."
         )
     
+    config["TELEGRAM_CHAT_ID"] = _parse_telegram_id(
+        "TELEGRAM_CHAT_ID", config["TELEGRAM_CHAT_ID"]
+    )
+
     # Optional configuration
     topic_id = os.getenv("TELEGRAM_TOPIC_ID")
     if topic_id:
-        config["TELEGRAM_TOPIC_ID"] = topic_id
+        config["TELEGRAM_TOPIC_ID"] = _parse_telegram_id(
+            "TELEGRAM_TOPIC_ID", topic_id
+        )
+
+    # Read-only view so callers cannot mutate the shared cached mapping
+    return MappingProxyType(config)
 
-    return config
+
+def _parse_telegram_id(name: str, value: str) -> int:
+    """
+    Parse a Telegram chat or topic ID from an environment variable value.
+    
+    Parameters:
+        name: Environment variable name, used in the error message.
+        value: Raw value (group chat IDs are negative).
+        
+    Returns:
+        int: Parsed ID.
+        
+    Raises:
+        ValueError: If the value is not an integer.
+    """
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(
+            f"{name} must be an integer, got {value!r}."
+        ) from None
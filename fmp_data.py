@@ -1,18 +1,71 @@
 """
 Financial Modeling Prep (FMP) data fetcher for historical OHLC data and current price.
 
-Fetches 1-month of historical OHLC data for SPX and formats as CSV with latest closing price.
+Fetches 1-month of historical OHLC data for SPX and formats as CSV with latest
+closing price and a compact summary of derived price features.
 """
 
-import requests
-from datetime import datetime, timedelta, timezone
+import math
+import statistics
+from datetime import date, datetime, time, timedelta, timezone
 import logging
-from typing import Tuple
+from operator import itemgetter
+from typing import Dict, Optional, Tuple, Union
+from zoneinfo import ZoneInfo
+
+from cache import cache_path, load_cached, store_cached
+from http_client import CLIENT, log_api_errors, parse_json_response
 
 logger = logging.getLogger(__name__)
 
+REQUEST_TIMEOUT_S = 30
+
+# US equity regular session, used to decide how long cached bars stay fresh
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+INTRADAY_CACHE_TTL_S = 60 * 60
+CLOSED_CACHE_TTL_S = 24 * 60 * 60
+
+# CSV layout sent to the analysis step
+_CSV_HEADER = "Date,Open,High,Low,Close"
+_CSV_ROW_FORMAT = "%s,%.2f,%.2f,%.2f,%.2f"
+_get_ohlc_fields = itemgetter("date", "open", "high", "low", "close")
 
-def fetch_spx_ohlc_csv(api_key: str, days: int = 30) -> Tuple[str, float]:
+
+def _ohlc_cache_ttl(now: Optional[datetime] = None) -> float:
+    """
+    Return how long cached OHLC data stays fresh at the given time.
+
+    Daily bars only change once per session, so during market hours entries
+    are kept for an hour and otherwise for up to a day. Outside market hours
+    the TTL is also capped at the time since the last close, so data cached
+    before the close is refetched once the final bar is available.
+
+    Parameters:
+        now: Reference time (default: current time).
+
+    Returns:
+        float: Maximum cache entry age in seconds.
+    """
+    now = (now or datetime.now(timezone.utc)).astimezone(MARKET_TZ)
+    is_weekday = now.weekday() < 5
+
+    if is_weekday and MARKET_OPEN <= now.time() < MARKET_CLOSE:
+        return INTRADAY_CACHE_TTL_S
+
+    # Walk back to the most recent weekday close (holidays are ignored)
+    last_close = datetime.combine(now.date(), MARKET_CLOSE, tzinfo=MARKET_TZ)
+    while last_close > now or last_close.weekday() >= 5:
+        last_close -= timedelta(days=1)
+
+    since_close = (now - last_close).total_seconds()
+    return min(CLOSED_CACHE_TTL_S, since_close)
+
+
+def fetch_spx_ohlc_csv(
+    api_key: str, days: int = 30
+) -> Tuple[str, float, Dict[str, Union[int, float]]]:
     """
     Fetch historical OHLC data for SPX from FMP API and return as CSV format with latest price.
     
@@ -21,50 +74,35 @@ def fetch_spx_ohlc_csv(api_key: str, days: int = 30) -> Tuple[str, float]:
         days (int): Number of days of historical data to fetch (default: 30).
     
     Returns:
-        Tuple[str, float]: CSV-formatted OHLC data with headers and latest closing price.
+        Tuple[str, float, Dict[str, Union[int, float]]]: CSV-formatted
+            OHLC data with headers, latest closing price, and summary price
+            features.
         
     Raises:
-        requests.exceptions.RequestException: If FMP API request fails.
+        httpx.HTTPError: If FMP API request fails.
         ValueError: If API response is invalid or missing required data.
     """
     symbol = "^GSPC"  # SPX ticker for FMP
     
-    try:
+    with log_api_errors("FMP", REQUEST_TIMEOUT_S):
         # FMP stable historical price endpoint (full version)
         url = "https://financialmodelingprep.com/stable/historical-price-eod/full"
         to_date = datetime.now(timezone.utc).date()
         from_date = to_date - timedelta(days=max(days * 2, 45))
-        params = {
-            "symbol": symbol,
-            "from": from_date.isoformat(),
-            "to": to_date.isoformat(),
-            "apikey": api_key,
-        }
-        
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        # Stable endpoint returns data as a list directly
-        if isinstance(data, list):
-            historical = data
-        elif isinstance(data, dict) and "historical" in data:
-            # Fallback for older endpoint format
-            historical = data["historical"]
+
+        # Skip the network round-trip when a fresh copy is cached on disk
+        cache_file = cache_path("fmp", symbol, to_date.isoformat(), days)
+        historical = load_cached(cache_file, _ohlc_cache_ttl())
+        if historical is not None:
+            logger.info("Using cached FMP OHLC data for %s", symbol)
         else:
-            raise ValueError(
-                f"Unexpected FMP API response structure. "
-                f"Response type: {type(data)}"
-            )
-        
-        if not historical:
-            raise ValueError(
-                f"No historical data returned from FMP for symbol {symbol}"
+            historical = _fetch_historical(
+                url, symbol, from_date, to_date, api_key
             )
+            store_cached(cache_file, historical)
         
-        # Sort by date ascending (oldest first)
-        historical = sorted(historical, key=lambda x: x["date"])
+        # Order by date ascending (oldest first)
+        historical = _sort_by_date(historical)
         
         # Limit to requested number of days (FMP may return more)
         if len(historical) > days:
@@ -73,38 +111,130 @@ def fetch_spx_ohlc_csv(api_key: str, days: int = 30) -> Tuple[str, float]:
         # Get latest closing price (last record)
         latest_close = float(historical[-1].get("close", 0))
         
-        # Format as CSV
-        csv_lines = ["Date,Open,High,Low,Close"]
-        
-        for record in historical:
-            date = record.get("date", "")
-            # Full endpoint returns OHLC fields
-            open_price = record.get("open", 0)
-            high_price = record.get("high", 0)
-            low_price = record.get("low", 0)
-            close_price = record.get("close", 0)
-            
-            csv_lines.append(
-                f"{date},{open_price:.2f},{high_price:.2f},{low_price:.2f},{close_price:.2f}"
-            )
-        
-        csv_data = "\n".join(csv_lines)
+        # Format as CSV: one itemgetter call per row pulls all OHLC fields
+        # at once and a single %-format string renders the row
+        csv_body = "\n".join(
+            _CSV_ROW_FORMAT % _get_ohlc_fields(record) for record in historical
+        )
+        csv_data = _CSV_HEADER + "\n" + csv_body
+        summary = _summarize_ohlc(historical)
         logger.info(
-            f"Successfully fetched {len(historical)} days of SPX OHLC data from FMP. "
-            f"Latest close: ${latest_close:.2f}"
+            "Successfully fetched %d days of SPX OHLC data from FMP. "
+            "Latest close: $%.2f",
+            len(historical),
+            latest_close,
         )
         
-        return csv_data, latest_close
-        
-    except requests.exceptions.Timeout:
-        logger.error("FMP API request timed out after 30 seconds")
-        raise
-    except requests.exceptions.HTTPError as e:
-        logger.error(f"FMP API returned HTTP error: {e.response.status_code} - {e}")
-        raise
-    except requests.exceptions.RequestException as e:
-        logger.error(f"FMP API request failed: {e}")
-        raise
-    except (KeyError, ValueError) as e:
-        logger.error(f"Failed to parse FMP API response: {e}")
-        raise
+        return csv_data, latest_close, summary
+
+
+def _summarize_ohlc(historical: list) -> Dict[str, Union[int, float]]:
+    """
+    Compute a compact set of price features from ordered OHLC records.
+
+    Lets the analysis prompt carry a handful of numbers instead of every
+    daily bar.
+
+    Parameters:
+        historical (list): OHLC record dictionaries ordered oldest first.
+
+    Returns:
+        Dict[str, Union[int, float]]: Day count, last close, 5/20-day simple
+            moving averages, period high/low, and annualized realized
+            volatility of daily log returns (omitted with fewer than two
+            closes).
+
+    Raises:
+        ValueError: If any close is zero or negative.
+    """
+    closes = [float(record["close"]) for record in historical]
+    if min(closes) <= 0:
+        raise ValueError("OHLC data contains a non-positive close price")
+    summary = {
+        "days": len(closes),
+        "last_close": round(closes[-1], 2),
+        "sma_5": round(statistics.fmean(closes[-5:]), 2),
+        "sma_20": round(statistics.fmean(closes[-20:]), 2),
+        "period_high": round(max(float(r["high"]) for r in historical), 2),
+        "period_low": round(min(float(r["low"]) for r in historical), 2),
+    }
+
+    if len(closes) >= 2:
+        log_returns = [
+            math.log(curr / prev) for prev, curr in zip(closes, closes[1:])
+        ]
+        summary["realized_vol_annualized"] = round(
+            statistics.pstdev(log_returns) * math.sqrt(252), 4
+        )
+
+    return summary
+
+
+def _sort_by_date(historical: list) -> list:
+    """
+    Return OHLC records ordered by date ascending.
+
+    FMP returns rows newest first, so a reversal is usually enough; the
+    full O(n log n) sort is only used when the rows are not monotonic.
+
+    Parameters:
+        historical (list): OHLC record dictionaries with ISO "date" keys.
+
+    Returns:
+        list: Records ordered oldest first.
+    """
+    dates = [record["date"] for record in historical]
+    if all(a >= b for a, b in zip(dates, dates[1:])):
+        return historical[::-1]
+    if all(a <= b for a, b in zip(dates, dates[1:])):
+        return historical
+    return sorted(historical, key=itemgetter("date"))
+
+
+def _fetch_historical(
+    url: str,
+    symbol: str,
+    from_date: date,
+    to_date: date,
+    api_key: str,
+) -> list:
+    """
+    Download raw historical OHLC records from the FMP API.
+
+    Parameters:
+        url (str): FMP historical price endpoint.
+        symbol (str): FMP ticker symbol.
+        from_date (date): First date of the requested range.
+        to_date (date): Last date of the requested range.
+        api_key (str): Financial Modeling Prep API key.
+
+    Returns:
+        list: Non-empty list of OHLC record dictionaries.
+
+    Raises:
+        httpx.HTTPError: If FMP API request fails.
+        ValueError: If API response is invalid or empty.
+    """
+    params = {
+        "symbol": symbol,
+        "from": from_date.isoformat(),
+        "to": to_date.isoformat(),
+        "apikey": api_key,
+    }
+
+    response = CLIENT.get(url, params=params, timeout=REQUEST_TIMEOUT_S)
+    data = parse_json_response(response)
+
+    # Stable endpoint returns data as a list directly
+    if not isinstance(data, list):
+        raise ValueError(
+            f"Unexpected FMP API response structure. "
+            f"Response type: {type(data)}"
+        )
+
+    if not data:
+        raise ValueError(
+            f"No historical data returned from FMP for symbol {symbol}"
+        )
+
+    return data
@@ -0,0 +1,180 @@
+"""
+Shared HTTP client for the zerogamma analysis pipeline.
+
+Provides a single pooled httpx client reused by every upstream API caller
+(SpotGamma, FMP, OpenRouter) so connections are kept alive between
+requests instead of being re-established on each call, plus the JSON
+parsing and error logging those callers have in common. HTTP/2 is enabled
+so requests to the same host are multiplexed over one TLS connection.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Iterator, Optional
+
+import httpx
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Transient statuses worth retrying for idempotent requests
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 3
+RETRY_BACKOFF_S = 0.3
+# Total time one request may spend sleeping between retries; these sleeps
+# come on top of the caller's per-attempt timeout
+MAX_RETRY_SLEEP_S = 10.0
+
+
+def _retry_after_s(response: httpx.Response) -> Optional[float]:
+    """
+    Parse a response's Retry-After header into a delay in seconds.
+
+    Parameters:
+        response: Response that may carry Retry-After.
+
+    Returns:
+        float | None: Non-negative delay, or None if the header is absent
+            or malformed. Both delta-seconds and HTTP-date forms are read.
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class _RetryTransport(httpx.HTTPTransport):
+    """
+    HTTP transport that retries GET requests on transient error statuses.
+
+    httpx's own transport retries only failed connection attempts. Only GET
+    requests are retried: POSTs (OpenRouter completions) are not idempotent
+    and a blind retry could bill the model twice.
+    """
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        """
+        Send the request, retrying GETs with exponential backoff.
+
+        A Retry-After header on the error response (common with 429 and
+        503) takes precedence over the backoff. Retrying stops, and the
+        error response is returned, once the next delay would push the
+        total sleep past MAX_RETRY_SLEEP_S; a Retry-After beyond that is
+        never cut short.
+
+        Parameters:
+            request: Outgoing request.
+
+        Returns:
+            httpx.Response: Final response, possibly still an error status.
+        """
+        slept_s = 0.0
+        for attempt in range(MAX_RETRIES + 1):
+            response = super().handle_request(request)
+            if (
+                request.method != "GET"
+                or response.status_code not in RETRY_STATUSES
+                or attempt == MAX_RETRIES
+            ):
+                return response
+
+            delay = _retry_after_s(response)
+            if delay is None:
+                delay = RETRY_BACKOFF_S * 2**attempt
+            if slept_s + delay > MAX_RETRY_SLEEP_S:
+                return response
+
+            response.close()
+            time.sleep(delay)
+            slept_s += delay
+
+
+def build_client() -> httpx.Client:
+    """
+    Build an HTTP/2 httpx client with connection pooling and GET retries.
+
+    Accept-Encoding is left to httpx, which advertises only the decoders
+    it can actually use ("br" once brotli is installed).
+
+    Returns:
+        httpx.Client: Configured client.
+    """
+    transport = _RetryTransport(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20),
+        retries=MAX_RETRIES,
+    )
+    return httpx.Client(
+        transport=transport,
+        timeout=httpx.Timeout(30.0, read=60.0),
+    )
+
+
+# Module-level singleton shared by all API callers
+CLIENT = build_client()
+
+
+def parse_json_response(response: httpx.Response) -> Any:
+    """
+    Raise for HTTP error statuses and decode the JSON response body.
+
+    Parameters:
+        response: Completed (non-streaming) response.
+
+    Returns:
+        Any: Decoded JSON value.
+
+    Raises:
+        httpx.HTTPStatusError: If the response status is an error.
+        ValueError: If the body is not valid JSON.
+    """
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+@contextmanager
+def log_api_errors(api_name: str, timeout_s: float) -> Iterator[None]:
+    """
+    Log request and parsing failures for an API call, then re-raise them.
+
+    Parameters:
+        api_name: Human-readable API name used in log messages.
+        timeout_s: Request timeout in seconds, reported on timeouts.
+
+    Raises:
+        httpx.HTTPError: Re-raised request failures.
+        KeyError, ValueError, TypeError: Re-raised response parsing failures.
+    """
+    try:
+        yield
+    except httpx.TimeoutException:
+        logger.error(
+            "%s API request timed out after %s seconds", api_name, timeout_s
+        )
+        raise
+    except httpx.HTTPStatusError as e:
+        logger.error(
+            "%s API returned HTTP error: %s - %s",
+            api_name,
+            e.response.status_code,
+            e.response.text,
+        )
+        raise
+    except httpx.HTTPError as e:
+        logger.error("%s API request failed: %s", api_name, e)
+        raise
+    except (KeyError, ValueError, TypeError) as e:
+        logger.error("Failed to parse %s API response: %s", api_name, e)
+        raise
@@ -4,47 +4,83 @@ OpenRouter API integration for market analysis using xiaomi/mimo-v2-flash model.
 Sends zero gamma level and SPX OHLC data to OpenRouter for AI-powered analysis.
 """
 
-import json
 import logging
 import re
+from typing import Dict, List, Optional, Union
 
-import requests
+import msgspec
+import httpx
+import orjson
+
+from cache import cache_path, load_cached, store_cached
+from http_client import CLIENT, log_api_errors
 
 logger = logging.getLogger(__name__)
 
+OPENROUTER_MODEL = "nvidia/nemotron-3-nano-30b-a3b:free"
+REQUEST_TIMEOUT_S = 60
+# Identical prompts yield equivalent analyses, so reuse them for a day
+# instead of re-billing the model on repeat runs
+ANALYSIS_CACHE_TTL_S = 24 * 60 * 60
+
+
+class StructuredAnalysis(msgspec.Struct):
+    """
+    Schema of the JSON object the model is prompted to return.
+
+    Attributes:
+        zero_gamma_significance: What the zero gamma level means for price.
+        trend: Short description of the recent trend.
+        implications: Short bullet points on trading implications.
+    """
+    zero_gamma_significance: str
+    trend: str
+    implications: List[str]
+
 
 def analyze_with_openrouter(
     api_key: str,
     zero_gamma_level: float,
     ohlc_csv: str,
     symbol: str = "SPX",
+    ohlc_summary: Optional[Dict[str, Union[int, float]]] = None,
+    verbose: bool = False,
 ) -> str:
     """
     Send zero gamma level and OHLC data to OpenRouter for market analysis.
     
+    When a summary is given, only its derived features are sent, which
+    keeps the prompt (and model input tokens) small; the full CSV is sent
+    when no summary is available or verbose is set.
+    
     Parameters:
         api_key (str): OpenRouter API key.
         zero_gamma_level (float): Zero gamma strike price level from SpotGamma.
         ohlc_csv (str): CSV-formatted OHLC data (Date,Open,High,Low,Close).
         symbol (str): Stock symbol being analyzed (default: SPX).
+        ohlc_summary (Dict[str, int | float] | None): Summary price features
+            from fetch_spx_ohlc_csv.
+        verbose (bool): Send the full OHLC CSV instead of the summary.
     
     Returns:
         str: Analysis text from xiaomi/mimo-v2-flash model.
         
     Raises:
-        requests.exceptions.RequestException: If OpenRouter API request fails.
+        httpx.HTTPError: If OpenRouter API request fails.
         ValueError: If API response is invalid or missing analysis.
     """
-    try:
+    with log_api_errors("OpenRouter", REQUEST_TIMEOUT_S):
         url = "https://openrouter.ai/api/v1/chat/completions"
         
         # Construct analysis prompt with market context
+        market_data = _build_market_data_section(
+            zero_gamma_level, ohlc_csv, ohlc_summary, verbose
+        )
         prompt = f"""Analyze the following market data for {symbol}:
 
 Zero Gamma Level: ${zero_gamma_level:.2f}
 
-Recent 30-Day OHLC Data:
-{ohlc_csv}
+{market_data}
 
     Return ONLY a JSON object with these fields:
     {{
@@ -59,13 +95,19 @@ Recent 30-Day OHLC Data:
     - No headers, no extra keys, no Markdown
     - The implications array should contain 2-4 short bullets"""
         
+        cache_file = cache_path("openrouter", OPENROUTER_MODEL, prompt)
+        cached = load_cached(cache_file, ANALYSIS_CACHE_TTL_S)
+        if cached is not None:
+            logger.info("Using cached OpenRouter analysis")
+            return cached
+        
         headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
         }
         
         payload = {
-            "model": "nvidia/nemotron-3-nano-30b-a3b:free",
+            "model": OPENROUTER_MODEL,
             "messages": [
                 {
                     "role": "user",
@@ -73,56 +115,107 @@ Recent 30-Day OHLC Data:
                 }
             ],
             "response_format": {"type": "json_object"},
+            # Stream tokens as server-sent events so the body is consumed
+            # while the model is still generating
+            "stream": True,
             # "temperature": 0.7,
             # "max_tokens": 250,
         }
         
-        response = requests.post(url, json=payload, headers=headers, timeout=60)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        # DEBUG: Log the full response for diagnosis
-        logger.debug(f"OpenRouter full response: {json.dumps(data, indent=2)}")
-        
-        if "choices" not in data or not data["choices"]:
-            # DEBUG: Log what we actually received
-            logger.error(f"OpenRouter response missing 'choices'. Response keys: {list(data.keys())}")
-            logger.error(f"Full response: {json.dumps(data, indent=2)}")
-            raise ValueError(
-                f"Unexpected OpenRouter API response structure. "
-                f"Response keys: {list(data.keys())}"
-            )
-        
-        analysis = data["choices"][0].get("message", {}).get("content", "")
+        with CLIENT.stream(
+            "POST",
+            url,
+            json=payload,
+            headers=headers,
+            timeout=REQUEST_TIMEOUT_S,
+        ) as response:
+            if response.is_error:
+                # Buffer the error body before the stream is closed so the
+                # HTTP error handler can log it
+                response.read()
+            response.raise_for_status()
+            analysis = _read_streamed_content(response)
         
         # DEBUG: Log the analysis content
-        logger.debug(f"Analysis content extracted: {repr(analysis)}")
+        logger.debug("Analysis content extracted: %r", analysis)
         
         if not analysis:
-            # DEBUG: Log the full choice object to see what's there
-            logger.error(f"Empty analysis. Full choice[0]: {json.dumps(data['choices'][0], indent=2)}")
             raise ValueError("OpenRouter returned empty analysis content")
         
         formatted = _format_structured_analysis(analysis)
+        store_cached(cache_file, formatted)
         logger.info("Successfully received analysis from OpenRouter")
         return formatted
-        
-    except requests.exceptions.Timeout:
-        logger.error("OpenRouter API request timed out after 60 seconds")
-        raise
-    except requests.exceptions.HTTPError as e:
-        logger.error(
-            f"OpenRouter API returned HTTP error: {e.response.status_code} - "
-            f"{e.response.text}"
+
+
+def _read_streamed_content(response: httpx.Response) -> str:
+    """
+    Assemble the completion text from an OpenRouter SSE stream.
+
+    Each event is a "data: {json}" line carrying a content delta; comment
+    lines (keep-alive notices) and blank separators are skipped, and the
+    stream ends with "data: [DONE]".
+
+    Parameters:
+        response (httpx.Response): Streaming chat completions response.
+
+    Returns:
+        str: Concatenated content deltas.
+
+    Raises:
+        ValueError: If the stream reports an error or a chunk is malformed.
+    """
+    pieces = []
+    for line in response.iter_lines():
+        if not line.startswith("data:"):
+            continue
+
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+
+        chunk = orjson.loads(data)
+        if "error" in chunk:
+            raise ValueError(f"OpenRouter stream error: {chunk['error']}")
+
+        choices = chunk.get("choices")
+        if not choices:
+            continue
+        pieces.append(choices[0].get("delta", {}).get("content") or "")
+
+    return "".join(pieces)
+
+
+def _build_market_data_section(
+    zero_gamma_level: float,
+    ohlc_csv: str,
+    ohlc_summary: Optional[Dict[str, Union[int, float]]],
+    verbose: bool,
+) -> str:
+    """
+    Build the price data block of the analysis prompt.
+
+    Parameters:
+        zero_gamma_level (float): Zero gamma strike price level.
+        ohlc_csv (str): CSV-formatted OHLC data.
+        ohlc_summary (Dict[str, int | float] | None): Summary price features.
+        verbose (bool): Use the full CSV even when a summary is available.
+
+    Returns:
+        str: Labeled prompt section with either the summary or the CSV.
+    """
+    if verbose or not ohlc_summary:
+        return f"Recent 30-Day OHLC Data:\n{ohlc_csv}"
+
+    summary = dict(ohlc_summary)
+    if zero_gamma_level:
+        summary["pct_from_zero_gamma"] = round(
+            (summary["last_close"] / zero_gamma_level - 1) * 100, 2
         )
-        raise
-    except requests.exceptions.RequestException as e:
-        logger.error(f"OpenRouter API request failed: {e}")
-        raise
-    except (KeyError, ValueError) as e:
-        logger.error(f"Failed to parse OpenRouter API response: {e}")
-        raise
+    return (
+        "Recent 30-Day Price Summary (JSON):\n"
+        f"{orjson.dumps(summary).decode('utf-8')}"
+    )
 
 
 def _format_structured_analysis(analysis: str) -> str:
@@ -142,34 +235,34 @@ def _format_structured_analysis(analysis: str) -> str:
     if not candidate:
         raise ValueError("OpenRouter returned invalid JSON")
 
+    # Decode and validate field types in a single pass
     try:
-        payload = json.loads(candidate)
-    except json.JSONDecodeError as exc:
+        payload = msgspec.json.decode(candidate, type=StructuredAnalysis)
+    except msgspec.ValidationError as exc:
+        raise ValueError(f"Invalid analysis fields: {exc}") from exc
+    except msgspec.DecodeError as exc:
         raise ValueError("OpenRouter returned invalid JSON") from exc
 
-    zero_gamma = payload.get("zero_gamma_significance")
-    trend = payload.get("trend")
-    implications = payload.get("implications")
+    zero_gamma = payload.zero_gamma_significance.strip()
+    trend = payload.trend.strip()
 
-    if not isinstance(zero_gamma, str) or not zero_gamma.strip():
+    if not zero_gamma:
         raise ValueError("Missing or invalid zero_gamma_significance")
-    if not isinstance(trend, str) or not trend.strip():
+    if not trend:
         raise ValueError("Missing or invalid trend")
-    if not isinstance(implications, list) or not implications:
+    if not payload.implications:
         raise ValueError("Missing or invalid implications list")
 
-    bullet_lines = []
-    for item in implications:
-        if not isinstance(item, str) or not item.strip():
-            continue
-        bullet_lines.append(f"- {item.strip()}")
+    bullet_lines = [
+        f"- {item.strip()}" for item in payload.implications if item.strip()
+    ]
 
     if not bullet_lines:
         raise ValueError("Implications list contained no valid items")
 
     formatted = (
-        f"**Zero Gamma**: {zero_gamma.strip()}\n"
-        f"**Trend**: {trend.strip()}\n"
+        f"**Zero Gamma**: {zero_gamma}\n"
+        f"**Trend**: {trend}\n"
         f"**Implications**:\n"
         f"{chr(10).join(bullet_lines)}"
     )
@@ -17,28 +17,38 @@ Environment Variables Required:
 
 import argparse
 import base64
-import hashlib
 import hmac
-import json
 import logging
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Any, Dict, Optional
 
-import requests
+import orjson
 
+from cache import atomic_write_text
 from config import get_config
+from http_client import CLIENT, log_api_errors, parse_json_response
 from fmp_data import fetch_spx_ohlc_csv
 from openrouter_analysis import analyze_with_openrouter
-from telegram_sender import send_to_telegram, format_analysis_message
+from telegram_sender import (
+    edit_telegram_message,
+    format_analysis_message,
+    format_header_message,
+    format_unavailable_message,
+    send_batch_to_telegram,
+    send_telegram_message,
+    split_message,
+)
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     handlers=[
-        logging.FileHandler("zerogamma_analysis.log"),
+        logging.FileHandler("zerogamma_analysis.log", delay=True),
         logging.StreamHandler(sys.stdout),
     ],
 )
@@ -49,6 +59,14 @@ logger = logging.getLogger(__name__)
 DEFAULT_SYM = "SPX"
 LEVELS_URL = "https://api.spotgamma.com/v2/levelsBySym?sym={sym}"
 JWT_SECRET = "secretKeyValue"
+_JWT_SECRET_BYTES = JWT_SECRET.encode("utf-8")
+# The token payload only carries "iat", so a signed token is reusable for a
+# short window instead of being re-signed on every request
+JWT_TTL_S = 30
+_JWT_CACHE: Dict[str, Any] = {"token": None, "exp": 0}
+
+# Last delivered zero gamma level per symbol, used to skip unchanged runs
+STATE_PATH = Path(".state.json")
 
 
 @dataclass(frozen=True)
@@ -81,13 +99,13 @@ def _b64url(data: bytes) -> str:
     return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
 
 
-def _jwt_hs256(payload: Dict[str, Any], secret: str) -> str:
+def _jwt_hs256(payload: Dict[str, Any], secret: bytes) -> str:
     """
     Create HS256-signed JWT token.
     
     Parameters:
         payload: JWT payload dictionary.
-        secret: Secret key for signing.
+        secret: UTF-8 encoded secret key for signing.
         
     Returns:
         str: Signed JWT token.
@@ -96,16 +114,30 @@ def _jwt_hs256(payload: Dict[str, Any], secret: str) -> str:
     payload = dict(payload)
     payload.setdefault("iat", int(time.time()))
 
-    header_part = _b64url(json.dumps(header, separators=(",", ":")).encode("utf-8"))
-    payload_part = _b64url(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    # orjson emits compact UTF-8 bytes, matching the JWT encoding directly
+    header_part = _b64url(orjson.dumps(header))
+    payload_part = _b64url(orjson.dumps(payload))
     signing_input = f"{header_part}.{payload_part}".encode("ascii")
 
-    signature = hmac.new(
-        secret.encode("utf-8"), signing_input, hashlib.sha256
-    ).digest()
+    # One-shot hmac.digest avoids building an HMAC object per signature
+    signature = hmac.digest(secret, signing_input, "sha256")
     return f"{header_part}.{payload_part}.{_b64url(signature)}"
 
 
+def _get_levels_token() -> str:
+    """
+    Return a SpotGamma JWT, re-signing only once the cached one expires.
+    
+    Returns:
+        str: Signed JWT token.
+    """
+    now = int(time.time())
+    if now >= _JWT_CACHE["exp"]:
+        _JWT_CACHE["token"] = _jwt_hs256({"iat": now}, _JWT_SECRET_BYTES)
+        _JWT_CACHE["exp"] = now + JWT_TTL_S
+    return _JWT_CACHE["token"]
+
+
 def fetch_zerogamma_level(*, sym: str, timeout_s: int = 30) -> ZeroGammaLevel:
     """
     Fetch zero gamma level from SpotGamma API.
@@ -118,15 +150,15 @@ def fetch_zerogamma_level(*, sym: str, timeout_s: int = 30) -> ZeroGammaLevel:
         ZeroGammaLevel: Zero gamma level data.
         
     Raises:
-        requests.exceptions.RequestException: If API request fails.
+        httpx.HTTPError: If API request fails.
         ValueError: If API response is invalid.
     """
-    token = _jwt_hs256({}, JWT_SECRET)
+    token = _get_levels_token()
 
     url = LEVELS_URL.format(sym=sym)
     
-    try:
-        resp = requests.get(
+    with log_api_errors("SpotGamma", timeout_s):
+        resp = CLIENT.get(
             url,
             headers={
                 "User-Agent": "Mozilla/5.0",
@@ -135,9 +167,7 @@ def fetch_zerogamma_level(*, sym: str, timeout_s: int = 30) -> ZeroGammaLevel:
             },
             timeout=timeout_s,
         )
-        resp.raise_for_status()
-
-        data = resp.json()
+        data = parse_json_response(resp)
         if not isinstance(data, list) or not data:
             raise ValueError("Unexpected response shape (expected non-empty list)")
 
@@ -153,40 +183,93 @@ def fetch_zerogamma_level(*, sym: str, timeout_s: int = 30) -> ZeroGammaLevel:
         )
         
         logger.info(
-            f"Successfully fetched zero gamma level for {sym}: "
-            f"${level.zero_g_strike:.2f}"
+            "Successfully fetched zero gamma level for %s: $%.2f",
+            sym,
+            level.zero_g_strike,
         )
         return level
+
+
+def _load_run_state() -> Dict[str, Any]:
+    """
+    Load the per-symbol state of the last successful run.
+    
+    Returns:
+        Dict[str, Any]: State keyed by symbol, empty if none is stored or
+            the state file is unreadable.
+    """
+    try:
+        state = orjson.loads(STATE_PATH.read_bytes())
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable state file %s: %s", STATE_PATH, e)
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _is_unchanged_since_last_run(level: ZeroGammaLevel) -> bool:
+    """
+    Check whether the zero gamma level matches the last delivered one.
+    
+    Parameters:
+        level: Freshly fetched zero gamma level.
         
-    except requests.exceptions.Timeout:
-        logger.error(f"SpotGamma API request timed out after {timeout_s} seconds")
-        raise
-    except requests.exceptions.HTTPError as e:
-        logger.error(
-            f"SpotGamma API returned HTTP error: {e.response.status_code}"
-        )
-        raise
-    except requests.exceptions.RequestException as e:
-        logger.error(f"SpotGamma API request failed: {e}")
-        raise
-    except (KeyError, ValueError, TypeError) as e:
-        logger.error(f"Failed to parse SpotGamma API response: {e}")
-        raise
+    Returns:
+        bool: True if trade date and strike equal the last successful run.
+            A level without a trade date never counts as unchanged.
+    """
+    if not level.trade_date:
+        return False
+    last = _load_run_state().get(level.sym)
+    return (
+        isinstance(last, dict)
+        and last.get("trade_date") == level.trade_date
+        and last.get("zero_g_strike") == level.zero_g_strike
+    )
+
+
+def _save_run_state(level: ZeroGammaLevel) -> None:
+    """
+    Record the zero gamma level of a successful run.
+    
+    Parameters:
+        level: Zero gamma level that was analyzed and delivered.
+    """
+    state = _load_run_state()
+    state[level.sym] = {
+        "trade_date": level.trade_date,
+        "zero_g_strike": level.zero_g_strike,
+    }
+    try:
+        atomic_write_text(STATE_PATH, orjson.dumps(state).decode("utf-8"))
+    except OSError as e:
+        logger.warning("Failed to write state file %s: %s", STATE_PATH, e)
 
 
 def run_analysis_pipeline(
     fmp_key: str,
     openrouter_key: str,
     telegram_token: str,
-    telegram_chat_id: str,
+    telegram_chat_id: int,
     symbol: str = DEFAULT_SYM,
-    telegram_topic_id: Optional[str] = None,
+    telegram_topic_id: Optional[int] = None,
+    force: bool = False,
 ) -> bool:
     """
     Execute complete analysis pipeline.
     
     Fetches zero gamma level → SPX OHLC data → OpenRouter analysis →
-    Telegram notification.
+    Telegram notification. Unless forced, the run stops after step 1 when
+    SpotGamma reports the same trade date and level as the last
+    successfully delivered run.
+    
+    The price and zero gamma level are posted to Telegram as soon as they
+    are known, and that message is edited to include the analysis once
+    OpenRouter responds. If the analysis fails after the header was posted,
+    the header is edited to say so and the run counts as delivered, so
+    later runs for the same trade date do not post it again. If that edit
+    fails too, the run fails without recording state so it is retried.
     
     Parameters:
         fmp_key: FMP API key.
@@ -195,27 +278,91 @@ def run_analysis_pipeline(
         telegram_chat_id: Telegram group chat ID.
         symbol: Stock symbol to analyze.
         telegram_topic_id: Telegram topic (message thread) ID.
+        force: Run every step even if the data has not changed.
         
     Returns:
         bool: True if pipeline completed, False if any step failed.
     """
     try:
-        # Step 1: Fetch zero gamma level
-        logger.info(f"Step 1: Fetching zero gamma level for {symbol}...")
-        zero_gamma_level = fetch_zerogamma_level(sym=symbol)
+        # Steps 1 and 2 are independent, so issue them concurrently; only
+        # step 3 needs both results. Threads suffice here since both calls
+        # block on network I/O through the shared pooled client. Once a
+        # run is on record, step 1 may end the run, so step 2 waits for it
+        # instead of fetching data that would be thrown away.
+        may_skip = not force and bool(_load_run_state())
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # Step 1: Fetch zero gamma level
+            logger.info("Step 1: Fetching zero gamma level for %s...", symbol)
+            zero_gamma_future = executor.submit(
+                fetch_zerogamma_level, sym=symbol
+            )
+
+            if may_skip:
+                zero_gamma_level = zero_gamma_future.result()
+                if _is_unchanged_since_last_run(zero_gamma_level):
+                    logger.info(
+                        "No new data since last run (trade date %s), skipping",
+                        zero_gamma_level.trade_date,
+                    )
+                    return True
+
+            # Step 2: Fetch SPX OHLC data (includes latest closing price)
+            logger.info("Step 2: Fetching SPX OHLC data from FMP...")
+            ohlc_future = executor.submit(
+                fetch_spx_ohlc_csv, api_key=fmp_key, days=30
+            )
+
+            zero_gamma_level = zero_gamma_future.result()
+            ohlc_csv, current_price, ohlc_summary = ohlc_future.result()
         
-        # Step 2: Fetch SPX OHLC data (includes latest closing price)
-        logger.info("Step 2: Fetching SPX OHLC data from FMP...")
-        ohlc_csv, current_price = fetch_spx_ohlc_csv(api_key=fmp_key, days=30)
+        # Post market data right away; the analysis is edited in below
+        logger.info("Posting market data header to Telegram...")
+        header_message_id = send_telegram_message(
+            bot_token=telegram_token,
+            chat_id=telegram_chat_id,
+            message=format_header_message(
+                zero_gamma_level=zero_gamma_level.zero_g_strike,
+                current_price=current_price,
+                symbol=symbol,
+            ),
+            message_thread_id=telegram_topic_id,
+        )
         
         # Step 3: Get OpenRouter analysis
         logger.info("Step 3: Analyzing data with OpenRouter...")
-        analysis = analyze_with_openrouter(
-            api_key=openrouter_key,
-            zero_gamma_level=zero_gamma_level.zero_g_strike,
-            ohlc_csv=ohlc_csv,
-            symbol=symbol,
-        )
+        try:
+            analysis = analyze_with_openrouter(
+                api_key=openrouter_key,
+                zero_gamma_level=zero_gamma_level.zero_g_strike,
+                ohlc_csv=ohlc_csv,
+                symbol=symbol,
+                ohlc_summary=ohlc_summary,
+            )
+        except Exception as e:
+            if header_message_id is None:
+                raise
+            # The market data is already out; replace its pending line
+            # rather than failing, so the next run does not repost it
+            logger.error("OpenRouter analysis failed: %s", e, exc_info=True)
+            if not edit_telegram_message(
+                bot_token=telegram_token,
+                chat_id=telegram_chat_id,
+                message_id=header_message_id,
+                message=format_unavailable_message(
+                    zero_gamma_level=zero_gamma_level.zero_g_strike,
+                    current_price=current_price,
+                    symbol=symbol,
+                ),
+            ):
+                # Leave the state unsaved so the next run tries again
+                # instead of skipping a header stuck on "pending"
+                return False
+            _save_run_state(zero_gamma_level)
+            logger.warning(
+                "Pipeline completed without analysis (rerun with --force "
+                "to retry it)"
+            )
+            return True
         
         # Step 4: Send to Telegram
         logger.info("Step 4: Sending analysis to Telegram...")
@@ -226,14 +373,25 @@ def run_analysis_pipeline(
             symbol=symbol,
         )
         
-        success = send_to_telegram(
+        # Fill in the header message, or send a new one if that failed; an
+        # analysis over Telegram's length limit continues in follow-ups
+        parts = split_message(message)
+        if header_message_id is not None and edit_telegram_message(
             bot_token=telegram_token,
             chat_id=telegram_chat_id,
-            message=message,
+            message_id=header_message_id,
+            message=parts[0],
+        ):
+            parts = parts[1:]
+        success = not parts or send_batch_to_telegram(
+            bot_token=telegram_token,
+            chat_id=telegram_chat_id,
+            messages=parts,
             message_thread_id=telegram_topic_id,
         )
         
         if success:
+            _save_run_state(zero_gamma_level)
             logger.info("Pipeline completed successfully")
             return True
         else:
@@ -244,7 +402,7 @@ def run_analysis_pipeline(
             return True  # Pipeline succeeded, Telegram failure is non-critical
         
     except Exception as e:
-        logger.error(f"Pipeline failed at step: {e}", exc_info=True)
+        logger.error("Pipeline failed at step: %s", e, exc_info=True)
         return False
 
 
@@ -261,6 +419,11 @@ def main():
         default=DEFAULT_SYM,
         help=f"Stock symbol to analyze (default: {DEFAULT_SYM})",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run the full pipeline even if the zero gamma data is unchanged",
+    )
     
     args = parser.parse_args()
     
@@ -280,6 +443,7 @@ def main():
             telegram_chat_id=config["TELEGRAM_CHAT_ID"],
             symbol=args.symbol,
             telegram_topic_id=config.get("TELEGRAM_TOPIC_ID"),
+            force=args.force,
         )
         
         logger.info("=" * 60)
@@ -291,13 +455,13 @@ def main():
             sys.exit(1)
             
     except ValueError as e:
-        logger.error(f"Configuration error: {e}")
+        logger.error("Configuration error: %s", e)
         sys.exit(1)
     except KeyboardInterrupt:
         logger.info("Pipeline interrupted by user")
         sys.exit(130)
     except Exception as e:
-        logger.error(f"Unexpected error: {e}", exc_info=True)
+        logger.error("Unexpected error: %s", e, exc_info=True)
         sys.exit(1)
 
 
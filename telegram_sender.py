@@ -5,22 +5,253 @@ Uses python-telegram-bot to post formatted analysis results.
 """
 
 import asyncio
-import html
+import atexit
 import logging
 import re
+import threading
+from datetime import date
+from typing import Any, Awaitable, Callable, Coroutine, TypeVar
 
-from telegram import Bot
-from telegram.error import TelegramError
+from telegram.error import BadRequest, NetworkError, RetryAfter, TelegramError
+from telegram.ext import AIORateLimiter, ExtBot
+from telegram.request import HTTPXRequest
+
+# uvloop is optional (unavailable on Windows); it speeds up the event loop
+# that drives Telegram sends, and the stdlib loop is used without it
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 logger = logging.getLogger(__name__)
 
+# Bots are cached per token so their underlying httpx connection pool (and
+# TLS session to api.telegram.org) is reused across sends. The pool is bound
+# to the event loop that first used it, so every send runs on one
+# long-lived loop, owned by a daemon thread, instead of a fresh
+# asyncio.run() loop per call. Callers on any thread submit coroutines to it.
+_BOTS: dict[str, ExtBot] = {}
+_BOTS_LOCK = asyncio.Lock()
+# uvloop.new_event_loop() is used rather than uvloop.install() so the
+# global event loop policy of the host process is left untouched
+_LOOP = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+_LOOP_THREAD = threading.Thread(
+    target=_LOOP.run_forever, name="telegram-sender", daemon=True
+)
+_LOOP_THREAD.start()
+
+# Telegram rejects messages longer than this; it counts the text after
+# HTML parsing, so measuring the markup as well errs on the safe side
+MAX_MESSAGE_LENGTH = 4096
+
+# Per-phase HTTP timeouts for Telegram requests; a single attempt can take
+# up to their sum before python-telegram-bot raises TimedOut
+CONNECT_TIMEOUT_S = 5.0
+WRITE_TIMEOUT_S = 5.0
+READ_TIMEOUT_S = 20.0
+POOL_TIMEOUT_S = 1.0
+ATTEMPT_TIMEOUT_S = (
+    CONNECT_TIMEOUT_S + WRITE_TIMEOUT_S + READ_TIMEOUT_S + POOL_TIMEOUT_S
+)
+
+# Transient Telegram failures (flood control, network errors) are retried
+# a few times so a blip does not drop an analysis that was costly to make
+MAX_SEND_ATTEMPTS = 3
+RETRY_BASE_DELAY_S = 0.5
+# Time one API call may spend on all its attempts and backoff delays
+RETRY_BUDGET_S = MAX_SEND_ATTEMPTS * ATTEMPT_TIMEOUT_S + sum(
+    RETRY_BASE_DELAY_S * 2**attempt for attempt in range(MAX_SEND_ATTEMPTS - 1)
+)
+
+# Upper bound on how long a caller waits for one Telegram operation: the
+# retry budget plus one request to initialize the Bot on first use. Retries
+# stop within the budget, so the wait never cancels an attempt midway.
+SEND_TIMEOUT_S = RETRY_BUDGET_S + ATTEMPT_TIMEOUT_S
+
+_T = TypeVar("_T")
+
+# Formatted message date, recomputed only when the day changes
+_TIMESTAMP_CACHE: tuple[date, str] | None = None
+
+# Telegram HTML message layouts, built once and filled per message. The
+# header is posted as soon as market data is in, then edited into the full
+# message once the analysis arrives.
+_HEADER_TEMPLATE = (
+    "<b>{symbol} Market Analysis</b>\n"
+    "<i>{timestamp}</i>\n\n"
+    "<b>Current Price:</b> ${current_price:.2f}\n"
+    "<b>Zero Gamma Level:</b> ${zero_gamma_level:.2f}"
+)
+_PENDING_TEMPLATE = _HEADER_TEMPLATE + "\n\n<i>Analysis pending...</i>"
+_UNAVAILABLE_TEMPLATE = (
+    _HEADER_TEMPLATE + "\n\n<i>Market analysis unavailable for this run.</i>"
+)
+_MESSAGE_TEMPLATE = _HEADER_TEMPLATE + "\n\n<b>Analysis:</b>\n{analysis}"
+
+# Markdown patterns converted for Telegram HTML, compiled once at import
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+# A "* " / "- " bullet line; captures its content without surrounding
+# whitespace ([^\S\n] is whitespace that never crosses a line break)
+_BULLET_RE = re.compile(
+    r"^[^\S\n]*[*-] [^\S\n]*(.*?)[^\S\n]*$", re.MULTILINE
+)
+_BULLET = "\u2022 "  # "• "
+_BULLET_REPLACEMENT = _BULLET + r"\1"
+# Escapes for HTML text content, applied in one str.translate pass. Quotes
+# only need escaping inside attribute values, which analyses never reach.
+_HTML_ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+# Characters that escaping or the Markdown conversion would change; text
+# without any of them passes through normalization unchanged
+_NEEDS_PROCESSING_RE = re.compile(r"[<>&*-]")
+# Units an overlong line may be cut between: tags and entities (never
+# split), words, and whitespace runs
+_HTML_UNIT_RE = re.compile(r"<[^<>]*>|&#?\w+;|[^<&\s]+|\s+|.")
+_HTML_TAG_RE = re.compile(r"<(/?)(\w+)[^<>]*>")
+
+
+async def _get_bot(bot_token: str) -> ExtBot:
+    """
+    Return the cached Bot for the given token, initializing it on first use.
+
+    The Bot throttles its own requests with AIORateLimiter so back-to-back
+    sends (such as the parts of a long analysis) stay within Telegram's
+    global and per-chat flood limits.
+
+    Parameters:
+        bot_token (str): Telegram bot token.
+
+    Returns:
+        ExtBot: Initialized Bot instance shared across sends.
+    """
+    async with _BOTS_LOCK:
+        bot = _BOTS.get(bot_token)
+        if bot is None:
+            # HTTP/2 multiplexes concurrent sends as streams over a single
+            # TLS connection, so one pooled connection is enough
+            bot = ExtBot(
+                token=bot_token,
+                request=HTTPXRequest(
+                    connection_pool_size=1,
+                    http_version="2",
+                    connect_timeout=CONNECT_TIMEOUT_S,
+                    read_timeout=READ_TIMEOUT_S,
+                    write_timeout=WRITE_TIMEOUT_S,
+                    pool_timeout=POOL_TIMEOUT_S,
+                ),
+                rate_limiter=AIORateLimiter(),
+            )
+            await bot.initialize()
+            _BOTS[bot_token] = bot
+    return bot
+
+
+async def shutdown() -> None:
+    """
+    Shut down all cached Bots and close their connection pools.
+    """
+    async with _BOTS_LOCK:
+        bots = list(_BOTS.values())
+        _BOTS.clear()
+    for bot in bots:
+        await bot.shutdown()
+
+
+def _run_on_loop(
+    coro: Coroutine[Any, Any, Any], timeout_s: float = SEND_TIMEOUT_S
+) -> Any:
+    """
+    Run a coroutine on the shared sender loop and wait for its result.
+
+    Parameters:
+        coro (Coroutine): Coroutine to execute.
+        timeout_s (float): Maximum time to wait for the result.
+
+    Returns:
+        Any: The coroutine's return value.
+
+    Raises:
+        concurrent.futures.TimeoutError: If it takes over timeout_s.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _LOOP)
+    try:
+        return future.result(timeout=timeout_s)
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def _shutdown_at_exit() -> None:
+    """
+    Close cached Bots and stop the shared event loop when the process exits.
+    """
+    try:
+        _run_on_loop(shutdown())
+    except Exception as e:
+        logger.warning("Failed to shut down Telegram bots cleanly: %s", e)
+    finally:
+        _LOOP.call_soon_threadsafe(_LOOP.stop)
+        _LOOP_THREAD.join(timeout=SEND_TIMEOUT_S)
+        if not _LOOP.is_running():
+            _LOOP.close()
+
+
+atexit.register(_shutdown_at_exit)
+
+
+async def _call_with_retries(call: Callable[[], Awaitable[_T]]) -> _T:
+    """
+    Await a Telegram API call, retrying transient failures.
+
+    RetryAfter (flood control) waits the delay Telegram asks for; network
+    errors and timeouts back off exponentially. BadRequest is a
+    NetworkError subclass in python-telegram-bot but is never transient,
+    so it is raised immediately. Retrying stops once the delay plus
+    another full attempt would overrun RETRY_BUDGET_S, counted from the
+    first attempt, so the call ends before the caller stops waiting.
+
+    Parameters:
+        call (Callable): Zero-argument function returning the API awaitable.
+
+    Returns:
+        The result of the successful call.
+
+    Raises:
+        TelegramError: If the call fails permanently or attempts run out.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + RETRY_BUDGET_S
+    for attempt in range(1, MAX_SEND_ATTEMPTS + 1):
+        try:
+            return await call()
+        except RetryAfter as e:
+            delay = e.retry_after
+            error = e
+        except BadRequest:
+            raise
+        except NetworkError as e:
+            delay = RETRY_BASE_DELAY_S * 2 ** (attempt - 1)
+            error = e
+
+        if (
+            attempt == MAX_SEND_ATTEMPTS
+            or loop.time() + delay + ATTEMPT_TIMEOUT_S > deadline
+        ):
+            raise error
+
+        logger.warning(
+            "Telegram request failed (%s), retrying in %.1f seconds",
+            error,
+            delay,
+        )
+        await asyncio.sleep(delay)
+
 
 async def _send_message_async(
     bot_token: str,
     chat_id_int: int,
     message: str,
     message_thread_id: int | None = None,
-) -> None:
+) -> int:
     """
     Send a Telegram message asynchronously.
 
@@ -29,165 +260,472 @@ async def _send_message_async(
         chat_id_int (int): Telegram chat ID as integer.
         message (str): Message text to send.
         message_thread_id (int | None): Telegram topic (message thread) ID.
+
+    Returns:
+        int: ID of the sent message.
     """
-    async with Bot(token=bot_token) as bot:
-        await bot.send_message(
+    bot = await _get_bot(bot_token)
+    sent = await _call_with_retries(
+        lambda: bot.send_message(
             chat_id=chat_id_int,
             text=message,
             parse_mode="HTML",
             message_thread_id=message_thread_id,
         )
+    )
+    return sent.message_id
+
+
+async def _send_many_async(
+    bot_token: str,
+    chat_id_int: int,
+    messages: list[str],
+    message_thread_id: int | None = None,
+) -> list[int]:
+    """
+    Send several Telegram messages one after another, in order.
+
+    Each send waits for the previous one, since concurrent sends can
+    arrive out of order and the messages are usually parts of one text.
+
+    Parameters:
+        bot_token (str): Telegram bot token.
+        chat_id_int (int): Telegram chat ID as integer.
+        messages (list[str]): Message texts to send.
+        message_thread_id (int | None): Telegram topic (message thread) ID.
+
+    Returns:
+        list[int]: IDs of the sent messages, in input order.
+
+    Raises:
+        TelegramError: If a send fails; later messages are not sent.
+    """
+    return [
+        await _send_message_async(
+            bot_token,
+            chat_id_int,
+            message,
+            message_thread_id=message_thread_id,
+        )
+        for message in messages
+    ]
+
+
+async def _edit_message_async(
+    bot_token: str,
+    chat_id_int: int,
+    message_id: int,
+    message: str,
+) -> None:
+    """
+    Replace the text of a sent Telegram message asynchronously.
+
+    Parameters:
+        bot_token (str): Telegram bot token.
+        chat_id_int (int): Telegram chat ID as integer.
+        message_id (int): ID of the message to edit.
+        message (str): New message text.
+    """
+    bot = await _get_bot(bot_token)
+    await _call_with_retries(
+        lambda: bot.edit_message_text(
+            text=message,
+            chat_id=chat_id_int,
+            message_id=message_id,
+            parse_mode="HTML",
+        )
+    )
+
+
+def send_telegram_message(
+    bot_token: str,
+    chat_id: int,
+    message: str,
+    message_thread_id: int | None = None,
+) -> int | None:
+    """
+    Send a message to Telegram group chat and return its message ID.
+    
+    Parameters:
+        bot_token (str): Telegram bot token.
+        chat_id (int): Telegram group chat ID (negative for groups).
+        message (str): Message text to send.
+        message_thread_id (int | None): Telegram topic (message thread) ID.
+    
+    Returns:
+        int | None: ID of the sent message, or None if sending failed.
+    """
+    try:
+        # Send message (async API) on the shared loop
+        message_id = _run_on_loop(
+            _send_message_async(
+                bot_token,
+                chat_id,
+                message,
+                message_thread_id=message_thread_id,
+            )
+        )
+        
+        logger.info("Successfully sent message to Telegram chat %s", chat_id)
+        return message_id
+        
+    except TelegramError as e:
+        logger.error("Telegram API error: %s", e)
+        return None
+    except Exception as e:
+        logger.error("Unexpected error while sending Telegram message: %s", e)
+        return None
 
 
 def send_to_telegram(
     bot_token: str,
-    chat_id: str,
+    chat_id: int,
     message: str,
-    message_thread_id: str | None = None,
+    message_thread_id: int | None = None,
 ) -> bool:
     """
     Send formatted message to Telegram group chat.
     
     Parameters:
         bot_token (str): Telegram bot token.
-        chat_id (str): Telegram group chat ID (can be negative for groups).
+        chat_id (int): Telegram group chat ID (negative for groups).
         message (str): Message text to send.
-        message_thread_id (str | None): Telegram topic (message thread) ID.
+        message_thread_id (int | None): Telegram topic (message thread) ID.
     
     Returns:
         bool: True if message sent successfully, False otherwise.
     """
+    return (
+        send_telegram_message(bot_token, chat_id, message, message_thread_id)
+        is not None
+    )
+
+
+def send_batch_to_telegram(
+    bot_token: str,
+    chat_id: int,
+    messages: list[str],
+    message_thread_id: int | None = None,
+) -> bool:
+    """
+    Send several messages to Telegram group chat, in order.
+    
+    All sends run in one submission to the shared loop, and the Bot's rate
+    limiter holds them to Telegram's flood limits. Sending stops at the
+    first failure so a later part never appears without an earlier one.
+    
+    Parameters:
+        bot_token (str): Telegram bot token.
+        chat_id (int): Telegram group chat ID (negative for groups).
+        messages (list[str]): Message texts to send.
+        message_thread_id (int | None): Telegram topic (message thread) ID.
+    
+    Returns:
+        bool: True if every message was sent successfully, False otherwise.
+    """
     try:
-        # Parse chat ID (handle negative group chat IDs)
-        try:
-            chat_id_int = int(chat_id)
-        except ValueError:
-            logger.error(f"Invalid chat ID format: {chat_id}")
-            return False
-
-        # Parse topic ID (optional)
-        topic_id_int = None
-        if message_thread_id:
-            try:
-                topic_id_int = int(message_thread_id)
-            except ValueError:
-                logger.error(
-                    f"Invalid message_thread_id format: {message_thread_id}"
-                )
-                return False
-
-        # Send message (async API)
-        try:
-            asyncio.run(
-                _send_message_async(
-                    bot_token,
-                    chat_id_int,
-                    message,
-                    message_thread_id=topic_id_int,
-                )
-            )
-        except RuntimeError:
-            loop = asyncio.get_event_loop()
-            loop.run_until_complete(
-                _send_message_async(
-                    bot_token,
-                    chat_id_int,
-                    message,
-                    message_thread_id=topic_id_int,
-                )
-            )
-        
-        logger.info(f"Successfully sent message to Telegram chat {chat_id}")
+        # Sends run back to back, so scale the wait with the batch
+        _run_on_loop(
+            _send_many_async(
+                bot_token,
+                chat_id,
+                messages,
+                message_thread_id=message_thread_id,
+            ),
+            timeout_s=SEND_TIMEOUT_S * max(1, len(messages)),
+        )
+
+        logger.info(
+            "Sent %d messages to Telegram chat %s", len(messages), chat_id
+        )
         return True
-        
+
     except TelegramError as e:
-        logger.error(f"Telegram API error: {e}")
+        logger.error("Telegram API error in batch send: %s", e)
         return False
     except Exception as e:
-        logger.error(f"Unexpected error while sending Telegram message: {e}")
+        logger.error("Unexpected error while sending Telegram messages: %s", e)
         return False
 
 
-def format_analysis_message(
+def edit_telegram_message(
+    bot_token: str,
+    chat_id: int,
+    message_id: int,
+    message: str,
+) -> bool:
+    """
+    Replace the text of a previously sent Telegram message.
+    
+    Parameters:
+        bot_token (str): Telegram bot token.
+        chat_id (int): Telegram group chat ID (negative for groups).
+        message_id (int): ID returned by send_telegram_message.
+        message (str): New message text.
+    
+    Returns:
+        bool: True if message edited successfully, False otherwise.
+    """
+    try:
+        _run_on_loop(
+            _edit_message_async(bot_token, chat_id, message_id, message)
+        )
+
+        logger.info(
+            "Successfully edited message %s in Telegram chat %s",
+            message_id,
+            chat_id,
+        )
+        return True
+
+    except TelegramError as e:
+        logger.error("Telegram API error: %s", e)
+        return False
+    except Exception as e:
+        logger.error("Unexpected error while editing Telegram message: %s", e)
+        return False
+
+
+def split_message(message: str, limit: int = MAX_MESSAGE_LENGTH) -> list[str]:
+    """
+    Split a message into parts that fit Telegram's length limit.
+
+    Parts break between lines where possible; the formatted messages never
+    open a tag on one line and close it on another, so such breaks keep
+    the HTML valid. A single line over the limit is cut by
+    _split_long_line, which never splits a tag or entity.
+
+    Parameters:
+        message (str): Formatted HTML message.
+        limit (int): Maximum length of each part.
+
+    Returns:
+        list[str]: Non-empty parts in order; just the message if it fits.
+    """
+    if len(message) <= limit:
+        return [message]
+
+    lines: list[str] = []
+    for line in message.split("\n"):
+        if len(line) > limit:
+            lines.extend(_split_long_line(line, limit))
+        else:
+            lines.append(line)
+
+    parts: list[str] = []
+    current = lines[0]
+    for line in lines[1:]:
+        if len(current) + 1 + len(line) <= limit:
+            current += "\n" + line
+        else:
+            parts.append(current)
+            current = line
+    parts.append(current)
+
+    # Blank lines at a break would otherwise lead or trail a part
+    return [part.strip("\n") for part in parts if part.strip("\n")]
+
+
+def _split_long_line(line: str, limit: int) -> list[str]:
+    """
+    Cut one overlong line of HTML into pieces of at most limit characters.
+
+    Cuts fall between words where possible and never inside a tag or an
+    entity such as "&amp;". Tags still open at a cut are closed at the end
+    of the piece and reopened at the start of the next, so each piece is
+    valid HTML on its own.
+
+    Parameters:
+        line (str): Line of Telegram HTML without line breaks.
+        limit (int): Maximum length of each piece.
+
+    Returns:
+        list[str]: Pieces in order.
+    """
+    logger.info("Cutting a %d-character line to fit Telegram", len(line))
+    pieces: list[str] = []
+    # (name, opening tag) of each tag open at the current position
+    open_tags: list[tuple[str, str]] = []
+
+    def closers() -> str:
+        return "".join(f"</{name}>" for name, _ in reversed(open_tags))
+
+    def openers() -> str:
+        return "".join(opening for _, opening in open_tags)
+
+    def flush(piece: str) -> None:
+        # Tags opened right before the cut would be empty here; they are
+        # reopened in the next piece anyway
+        body = piece.rstrip()
+        closing = closers()
+        for name, opening in reversed(open_tags):
+            if not body.endswith(opening):
+                break
+            body = body[:-len(opening)].rstrip()
+            closing = closing[len(name) + 3:]
+        if body:
+            pieces.append(body + closing)
+
+    piece = ""
+    for unit in _HTML_UNIT_RE.findall(line):
+        tag = _HTML_TAG_RE.fullmatch(unit)
+        is_word = tag is None and not unit.startswith("&")
+        # Room the closing tags will need once unit is in the piece
+        if tag is None:
+            reserve = len(closers())
+        elif tag[1]:
+            reserve = len(closers()) - len(unit)
+        else:
+            reserve = len(closers()) + len(tag[2]) + 3
+
+        while unit and len(piece) + len(unit) + reserve > limit:
+            room = limit - len(piece) - reserve
+            if is_word and not unit.isspace() and room > 0 and (
+                piece == openers() or len(unit) > limit // 2
+            ):
+                # A word too long to move whole is cut between characters
+                piece += unit[:room]
+                unit = unit[room:]
+            elif piece == openers():
+                # Nothing to flush; oversized markup gets a piece of its own
+                # and whitespace at the start of a piece is dropped
+                if unit.isspace():
+                    unit = ""
+                break
+            flush(piece)
+            piece = openers()
+            if unit.isspace():
+                unit = ""
+
+        if tag is not None and tag[1]:
+            if open_tags and open_tags[-1][0] == tag[2]:
+                open_tags.pop()
+        elif tag is not None:
+            open_tags.append((tag[2], unit))
+        piece += unit
+
+    if piece.strip():
+        pieces.append(piece)
+    return pieces
+
+
+def _today_timestamp() -> str:
+    """
+    Return today's date formatted for messages, cached per day.
+
+    Returns:
+        str: Local date as YYYY-MM-DD.
+    """
+    global _TIMESTAMP_CACHE
+    today = date.today()
+    if _TIMESTAMP_CACHE is None or _TIMESTAMP_CACHE[0] != today:
+        _TIMESTAMP_CACHE = (today, today.strftime("%Y-%m-%d"))
+    return _TIMESTAMP_CACHE[1]
+
+
+def format_header_message(
     zero_gamma_level: float,
-    analysis: str,
     current_price: float,
     symbol: str = "SPX",
 ) -> str:
     """
-    Format analysis results for Telegram message.
+    Format the market data header posted before the analysis is ready.
     
     Parameters:
         zero_gamma_level (float): Zero gamma strike price.
-        analysis (str): Market analysis text from OpenRouter.
         current_price (float): Current market price of symbol.
         symbol (str): Stock symbol being analyzed.
     
     Returns:
         str: Formatted HTML message for Telegram.
     """
-    timestamp = __import__("datetime").datetime.now().strftime(
-        "%Y-%m-%d"
-    )
-    formatted_analysis = _normalize_analysis_for_telegram(analysis)
-
-    message = (
-        f"<b>{symbol} Market Analysis</b>\n"
-        f"<i>{timestamp}</i>\n\n"
-        f"<b>Current Price:</b> ${current_price:.2f}\n"
-        f"<b>Zero Gamma Level:</b> ${zero_gamma_level:.2f}\n\n"
-        f"<b>Analysis:</b>\n"
-        f"{formatted_analysis}"
+    return _PENDING_TEMPLATE.format(
+        symbol=symbol,
+        timestamp=_today_timestamp(),
+        current_price=current_price,
+        zero_gamma_level=zero_gamma_level,
     )
-    
-    return message
 
 
-def _normalize_analysis_for_telegram(text: str) -> str:
+def format_unavailable_message(
+    zero_gamma_level: float,
+    current_price: float,
+    symbol: str = "SPX",
+) -> str:
     """
-    Normalize analysis text for Telegram HTML parse mode.
-
-    Converts Markdown bold to HTML bold, preserves bullets, and escapes
-    unsupported HTML characters to avoid formatting issues.
-
+    Format the market data header with a note that the analysis failed.
+    
     Parameters:
-        text (str): Raw analysis text from OpenRouter.
-
+        zero_gamma_level (float): Zero gamma strike price.
+        current_price (float): Current market price of symbol.
+        symbol (str): Stock symbol being analyzed.
+    
     Returns:
-        str: Telegram-safe HTML text.
+        str: Formatted HTML message for Telegram.
     """
-    escaped = html.escape(text)
-    lines = escaped.splitlines()
-    normalized_lines = [_convert_line(line) for line in lines]
-    return "\n".join(normalized_lines).strip()
+    return _UNAVAILABLE_TEMPLATE.format(
+        symbol=symbol,
+        timestamp=_today_timestamp(),
+        current_price=current_price,
+        zero_gamma_level=zero_gamma_level,
+    )
 
 
-def _convert_line(line: str) -> str:
+def format_analysis_message(
+    zero_gamma_level: float,
+    analysis: str,
+    current_price: float,
+    symbol: str = "SPX",
+    pre_formatted: bool = False,
+) -> str:
     """
-    Convert a single line to Telegram-safe HTML.
-
+    Format analysis results for Telegram message.
+    
     Parameters:
-        line (str): Escaped text line.
-
+        zero_gamma_level (float): Zero gamma strike price.
+        analysis (str): Market analysis text from OpenRouter.
+        current_price (float): Current market price of symbol.
+        symbol (str): Stock symbol being analyzed.
+        pre_formatted (bool): Analysis is already Telegram-safe HTML and
+            is inserted as-is, skipping Markdown conversion and escaping.
+    
     Returns:
-        str: Converted line with bullets and bold formatting.
+        str: Formatted HTML message for Telegram.
     """
-    stripped = line.lstrip()
-    bullet_prefixes = ("* ", "- ")
-    if stripped.startswith(bullet_prefixes):
-        content = stripped[2:].strip()
-        return f"• {_convert_bold_markdown(content)}"
-    return _convert_bold_markdown(line)
+    timestamp = _today_timestamp()
+    formatted_analysis = (
+        analysis
+        if pre_formatted
+        else _normalize_analysis_for_telegram(analysis)
+    )
+
+    return _MESSAGE_TEMPLATE.format(
+        symbol=symbol,
+        timestamp=timestamp,
+        current_price=current_price,
+        zero_gamma_level=zero_gamma_level,
+        analysis=formatted_analysis,
+    )
 
 
-def _convert_bold_markdown(text: str) -> str:
+def _normalize_analysis_for_telegram(text: str) -> str:
     """
-    Convert Markdown bold markers to Telegram HTML bold tags.
+    Normalize analysis text for Telegram HTML parse mode.
+
+    Converts Markdown bold to HTML bold, preserves bullets, and escapes
+    unsupported HTML characters to avoid formatting issues. Bullets and
+    bold runs are each converted with one regex substitution over the
+    whole text, so no per-line Python code runs.
 
     Parameters:
-        text (str): Escaped text containing Markdown bold markers.
+        text (str): Raw analysis text from OpenRouter.
 
     Returns:
-        str: Text with Markdown bold converted to HTML.
+        str: Telegram-safe HTML text.
     """
-    return re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", text)
+    if not _NEEDS_PROCESSING_RE.search(text):
+        return text.strip()
+
+    escaped = text.translate(_HTML_ESCAPE_TABLE)
+    bulleted = _BULLET_RE.sub(_BULLET_REPLACEMENT, escaped)
+    return _BOLD_RE.sub(r"<b>\1</b>", bulleted).strip()